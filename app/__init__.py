@@ -1,10 +1,28 @@
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import secrets
+from app.utils.format_utils import orjson_dumps, clean_data_for_json
+
+class FastJSONProvider(DefaultJSONProvider):
+    """基于orjson的JSON序列化，供jsonify使用"""
+    # 与 JSON_SORT_KEYS=False 一致，默认不排序键
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        sort_keys = kwargs.pop('sort_keys', self.sort_keys)
+        # orjson只支持排序选项，传入indent等其他参数时交给Flask默认实现
+        if not kwargs:
+            data = orjson_dumps(obj, sort_keys)
+            if data is not None:
+                return data.decode('utf-8')
+        # 未安装orjson或存在orjson无法处理的类型时，先清理NaN/numpy等值，再由默认实现处理Decimal、UUID、dataclass等
+        return super().dumps(clean_data_for_json(obj), sort_keys=sort_keys, **kwargs)
 
 def create_app():
     app = Flask(__name__)
     CORS(app)  # 允许跨域请求
+    app.json = FastJSONProvider(app)
 
     # 高并发优化配置
     app.config['JSONIFY_PRETTYPRINT_REGULAR'] = False
@@ -25,6 +43,10 @@ def create_app():
     from app.errors.handlers import errors_bp
     app.register_blueprint(errors_bp)
 
+    # SSE共享心跳线程
+    from app.container import sse_manager
+    sse_manager.start_heartbeat()
+
     print("\n=== Registered Routes ===")
     for rule in app.url_map.iter_rules():
         methods = ",".join(sorted(rule.methods - {"HEAD", "OPTIONS"}))
@@ -41,13 +41,14 @@ def analyze_stock_stream():
         logger.info(f"开始流式分析股票: {stock_code}, 客户端: {client_id}")
 
         def run_analysis():
+            streamer = StreamingSender(client_id, sse_manager)
             try:
-                streamer = StreamingSender(client_id, sse_manager)
                 analyzer.analyze_stock_with_streaming(stock_code, position_percent, avg_price, streamer)
                 logger.info(f"股票流式分析完成: {stock_code}")
             except Exception as e:
                 logger.error(f"股票流式分析失败: {stock_code}, 错误: {e}")
             finally:
+                streamer.close()
                 analysis_manager.remove_task(stock_code)
 
         executor.submit(run_analysis)
@@ -76,7 +77,15 @@ def batch_analyze_stream():
             }), 500
         
         data = request.json
-        stock_codes = data.get('stock_codes', [])
+        raw_codes = data.get('stock_codes', [])
+        # 先校验类型，列表中混入不可哈希的元素时 dict.fromkeys 会抛出 TypeError
+        if not isinstance(raw_codes, list) or not all(isinstance(code, str) for code in raw_codes):
+            return jsonify({
+                'success': False,
+                'error': '股票代码列表格式错误，应为字符串列表'
+            }), 400
+        # 去重并保持原有顺序
+        stock_codes = list(dict.fromkeys(raw_codes))
         client_id = data.get('client_id')
         
         if not stock_codes:
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, session, render_template, redirect, url_for
-from datetime import datetime
+import time
 from app.utils.decorators import require_auth
 from app.container.analyzer import get_analyzer
 from app.logger import logger
@@ -27,7 +27,7 @@ def login():
 
         if password == config_password:
             session['authenticated'] = True
-            session['login_time'] = datetime.now().isoformat()
+            session['login_time'] = time.time()
             logger.info("用户登录成功")
             return redirect(url_for('auth.index'))
         else:
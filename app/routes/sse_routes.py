@@ -1,13 +1,19 @@
 from flask import Blueprint, Response, request
-from datetime import datetime
-from queue import Empty, Queue
-import json
+from queue import Empty
+import time
 from app.utils.decorators import require_auth
 from app.logger import logger
 from app.container import sse_manager
+from app.utils.sse_manager import ClientChannel, format_sse_frame
 
 sse_bp = Blueprint('sse', __name__)
 
+# 合并发送的时间窗口（秒）和单次写出的最大字节数
+SSE_BATCH_WINDOW = 0.05
+SSE_BATCH_MAX_BYTES = 64 * 1024
+# 心跳由 SSEManager 的共享线程广播，这里只是空闲等待的超时
+SSE_IDLE_TIMEOUT = 60
+
 @sse_bp.route('/stream')
 @require_auth
 def sse_stream():
@@ -16,27 +22,37 @@ def sse_stream():
         return "Missing client_id", 400
 
     def event_stream():
-        client_queue = Queue()
+        client_queue = ClientChannel()
         sse_manager.add_client(client_id, client_queue)
 
         try:
-            yield f"data: {json.dumps({'event': 'connected', 'data': {'client_id': client_id}})}\n\n"
+            yield format_sse_frame({'event': 'connected', 'data': {'client_id': client_id}})
             while True:
                 try:
-                    message = client_queue.get(timeout=30)
-                    try:
-                        json_data = json.dumps(message, ensure_ascii=False)
-                        yield f"data: {json_data}\n\n"
-                    except (TypeError, ValueError) as e:
-                        logger.error(f"SSE消息序列化失败: {e}")
-                        yield f"data: {json.dumps({'event': 'error', 'data': {'error': str(e)}})}\n\n"
+                    # 队列中已是序列化好的SSE帧，直接写出
+                    frame = client_queue.get(timeout=SSE_IDLE_TIMEOUT)
+                    # 在短时间窗口内合并后续消息，一次写出多个SSE帧
+                    frames = [frame]
+                    size = len(frame)
+                    deadline = time.monotonic() + SSE_BATCH_WINDOW
+                    while size < SSE_BATCH_MAX_BYTES:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        try:
+                            frame = client_queue.get(timeout=remaining)
+                        except Empty:
+                            break
+                        frames.append(frame)
+                        size += len(frame)
+                    yield b"".join(frames)
                 except Empty:
-                    yield f"data: {json.dumps({'event': 'heartbeat', 'data': {'timestamp': datetime.now().isoformat()}})}\n\n"
+                    continue
                 except GeneratorExit:
                     break
                 except Exception as e:
                     logger.error(f"SSE流处理错误: {e}")
-                    yield f"data: {json.dumps({'event': 'error', 'data': {'error': str(e)}})}\n\n"
+                    yield format_sse_frame({'event': 'error', 'data': {'error': str(e)}})
                     break
         finally:
             sse_manager.remove_client(client_id)
@@ -1,8 +1,8 @@
 from flask import Blueprint, jsonify
-from datetime import datetime
 
 from app.container.analyzer import get_analyzer
 from app.container import sse_manager, analysis_manager, executor
+from app.utils.format_utils import now_iso
 
 status_bp = Blueprint('status', __name__)
 
@@ -20,7 +20,7 @@ def status():
             'analyzer_available': analyzer is not None,
             'auth_enabled': auth_enabled,
             'sse_support': True,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso()
         })
     except Exception as e:
         return jsonify({
@@ -52,7 +52,7 @@ def get_system_info():
                 'auth_enabled': auth_enabled,
                 'auth_configured': auth_config.password != '',
                 'version': 'Enhanced v3.0-Web-SSE',
-                'timestamp': datetime.now().isoformat()
+                'timestamp': now_iso()
             }
         })
         
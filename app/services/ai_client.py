@@ -8,6 +8,10 @@ from app.utils.config import GenerationConfig
 from app.services.prompt_builder import build_enhanced_ai_analysis_prompt, build_K_graph_table_prompt, build_news_section, \
                                         build_news_summary_prompt, build_value_prompt
 
+# AI流式内容合并发送：最多间隔25ms或累计4096字符发送一次
+AI_STREAM_FLUSH_INTERVAL = 0.025
+AI_STREAM_FLUSH_CHARS = 4096
+
 def generate_ai_analysis(analysis_data:dict, generation_config:GenerationConfig,
                          enable_streaming:bool=False, streamer:StreamingSender=None) -> str:
     """生成AI增强分析 - 支持流式输出"""
@@ -36,16 +40,34 @@ def generate_ai_analysis(analysis_data:dict, generation_config:GenerationConfig,
         
         # 设置AI流式内容处理
         ai_content_buffer = ""
+        pending_chunks = []
+        pending_chars = 0
+        last_flush = time.monotonic()
+        
+        def flush_ai_stream():
+            """将积攒的流式内容合并为一个事件发送"""
+            nonlocal pending_chars, last_flush
+            if pending_chunks:
+                streamer.send_ai_stream("".join(pending_chunks))
+                pending_chunks.clear()
+                pending_chars = 0
+            last_flush = time.monotonic()
         
         def ai_stream_callback(content):
             """AI流式内容回调"""
-            nonlocal ai_content_buffer
+            nonlocal ai_content_buffer, pending_chars
             ai_content_buffer += content
-            # 实时发送AI流式内容
-            streamer.send_ai_stream(content)
+            pending_chunks.append(content)
+            pending_chars += len(content)
+            # 按时间或长度合并发送，避免每个token一个SSE事件
+            if pending_chars >= AI_STREAM_FLUSH_CHARS or time.monotonic() - last_flush >= AI_STREAM_FLUSH_INTERVAL:
+                flush_ai_stream()
         
         # 调用AI API（支持流式）
-        ai_response = _call_ai_api(prompt, generation_config, enable_streaming, ai_stream_callback)
+        try:
+            ai_response = _call_ai_api(prompt, generation_config, enable_streaming, ai_stream_callback)
+        finally:
+            flush_ai_stream()
         
         if ai_response:
             logger.info("✅ AI深度分析完成")
@@ -1,17 +1,53 @@
+import numpy as np
 import pandas as pd
 import akshare as ak
-import math
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 from app.logger import logger
 from app.utils.config import load_config
-from app.utils.financial_utils import (get_price_info, calculate_technical_indicators, get_K_graph_table)
+from app.utils.financial_utils import (get_price_info, calculate_technical_indicators, get_K_graph_table,
+                                      extract_financial_indicators, warmup_indicator_kernels)
 from app.utils.sse_manager import StreamingSender
-from app.utils.format_utils import format_value
+from app.utils.report_store import ReportStore
+from app.utils.bounded_cache import LRUCache
+from app.utils.format_utils import format_value, now_str
 from app.container import sse_manager
 from app.services.ai_client import generate_ai_analysis, news_summarize, k_graph_analysis, value_analyze
 
+# 扩展的情绪词典
+POSITIVE_WORDS = frozenset({
+    '上涨', '涨停', '利好', '突破', '增长', '盈利', '收益', '回升', '强势', '看好',
+    '买入', '推荐', '优秀', '领先', '创新', '发展', '机会', '潜力', '稳定', '改善',
+    '提升', '超预期', '积极', '乐观', '向好', '受益', '龙头', '热点', '爆发', '翻倍',
+    '业绩', '增收', '扩张', '合作', '签约', '中标', '获得', '成功', '完成', '达成'
+})
+
+NEGATIVE_WORDS = frozenset({
+    '下跌', '跌停', '利空', '破位', '下滑', '亏损', '风险', '回调', '弱势', '看空',
+    '卖出', '减持', '较差', '落后', '滞后', '困难', '危机', '担忧', '悲观', '恶化',
+    '下降', '低于预期', '消极', '压力', '套牢', '被套', '暴跌', '崩盘', '踩雷', '退市',
+    '违规', '处罚', '调查', '停牌', '亏损', '债务', '违约', '诉讼', '纠纷', '问题'
+})
+
+# 流式分析中已通过独立事件推送过的报告字段，最终结果中不再重复序列化发送
+STREAMED_REPORT_KEYS = frozenset(('prompt', 'value_prompt', 'data_quality'))
+
+@lru_cache(maxsize=None)
+def _quarter_candidates(year:int, month:int) -> tuple[str, ...]:
+    """按时间倒序返回最近四个可能已披露的报告期"""
+    if month <= 3:
+        return (f"{year-1}1231", f"{year-1}0930", f"{year-1}0630", f"{year-1}0331")
+    elif month <= 6:
+        return (f"{year}0331", f"{year-1}1231", f"{year-1}0930", f"{year-1}0630")
+    elif month <= 9:
+        return (f"{year}0630", f"{year}0331", f"{year-1}1231", f"{year-1}0930")
+    else:
+        return (f"{year}0930", f"{year}0630", f"{year}0331", f"{year-1}1231")
+
 class WebStockAnalyzer:
     """Web版增强股票分析器"""
     
@@ -26,10 +62,22 @@ class WebStockAnalyzer:
         self.price_cache_duration = timedelta(hours=self.config.cache.price_hours)
         self.fundamental_cache_duration = timedelta(hours=self.config.cache.fundamental_hours)
         self.news_cache_duration = timedelta(hours=self.config.cache.news_hours)
+        self.report_cache_duration = timedelta(seconds=self.config.cache.report_seconds)
         
         self.price_cache = {}
         self.fundamental_cache = {}
         self.news_cache = {}
+        # 批量分析的完整报告（不含持仓信息），短时间内重复查询直接复用；报告体积较大，同样限量缓存
+        self.report_cache = LRUCache(self.config.cache.max_entries)
+        # 报告同时落盘，当日价格缓存有效期内重启后仍可复用
+        self.report_store = ReportStore(self.config.cache.report_dir, self.price_cache_duration.total_seconds())
+        # 由价格数据派生的指标，价格数据对象未刷新时直接复用；按最近使用淘汰，避免长期运行时无限增长
+        self.price_analysis_cache = LRUCache(self.config.cache.max_entries)
+        # 正在分析中的报告，同一股票的并发请求共享一次分析
+        self._inflight_reports = {}
+        # 行业数据与个股无关，按行业缓存整表，供同一行业的股票共用；板块总表只有一份，成分股按行业限量缓存
+        self.industry_board_cache = None
+        self.industry_cons_cache = LRUCache(self.config.cache.max_entries)
         
         # 权重配置， 重新归一化
         weights_sum = self.config.analysis_weights.technical + self.config.analysis_weights.fundamental + self.config.analysis_weights.sentiment
@@ -38,6 +86,14 @@ class WebStockAnalyzer:
             self.config.analysis_weights.technical /= weights_sum
             self.config.analysis_weights.fundamental /= weights_sum
             self.config.analysis_weights.sentiment /= weights_sum
+        # 权重在运行期间不会变化，缓存导出结果供每份报告复用
+        self._weights_dump = self.config.analysis_weights.model_dump()
+        # 辅助分析（K线、新闻、估值）使用关闭思考模式的生成配置，只需复制一次
+        self._no_thinking_generation = self.config.generation.model_copy(
+            update={'extra_parm': {"chat_template_kwargs": {"enable_thinking": False}}})
+        # 基本面和新闻数据的后台获取共用一个线程池，避免每次分析都创建和销毁线程
+        self.fetch_pool = ThreadPoolExecutor(max_workers=max(2, self.config.analysis_params.fetch_workers),
+                                             thread_name_prefix="fetch")
         
         logger.info("Web版股票分析器初始化完成")
         self._log_config_status()
@@ -67,17 +123,18 @@ class WebStockAnalyzer:
 
     def get_stock_data(self, stock_code:str):
         """获取股票价格数据"""
+        now = datetime.now()
         if stock_code in self.price_cache:
             cache_time, data = self.price_cache[stock_code]
-            if datetime.now() - cache_time < self.price_cache_duration:
+            if now - cache_time < self.price_cache_duration:
                 logger.info(f"使用缓存的价格数据: {stock_code}")
                 return data
         
         try:
-            end_date = datetime.now().strftime('%Y%m%d')
+            end_date = now.strftime('%Y%m%d')
             # 使用用户配置的技术分析周期
             days = self.config.analysis_params.technical_period_days
-            start_date = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
+            start_date = (now - timedelta(days=days)).strftime('%Y%m%d')
             
             logger.info(f"正在获取 {stock_code} 的历史数据 (过去{days}天)...")
             
@@ -141,7 +198,7 @@ class WebStockAnalyzer:
                     raise ValueError(f"股票 {stock_code} 的收盘价数据异常")
             
             # 缓存数据
-            self.price_cache[stock_code] = (datetime.now(), stock_data)
+            self.price_cache[stock_code] = (now, stock_data)
             
             logger.info(f"✓ 成功获取 {stock_code} 的价格数据，共 {len(stock_data)} 条记录")
             logger.info(f"✓ 数据列: {list(stock_data.columns)}")
@@ -154,14 +211,13 @@ class WebStockAnalyzer:
 
     def get_comprehensive_fundamental_data(self, stock_code:str) -> dict:
         """获取项综合财务指标数据"""
+        current_time = datetime.now()
         if stock_code in self.fundamental_cache:
             cache_time, data = self.fundamental_cache[stock_code]
-            if datetime.now() - cache_time < self.fundamental_cache_duration:
+            if current_time - cache_time < self.fundamental_cache_duration:
                 logger.info(f"使用缓存的基本面数据: {stock_code}")
                 return data
         
-        current_time = datetime.today()
-        
         try:
             fundamental_data = {}
             logger.info(f"开始获取 {stock_code} 的综合财务指标...")
@@ -184,18 +240,9 @@ class WebStockAnalyzer:
                 # 获取财务分析指标
                 financial_analysis_indicator = ak.stock_financial_analysis_indicator(symbol=stock_code, start_year=f"{current_time.year}")
                 if not financial_analysis_indicator.empty:
-                    latest_financial_analysis_indicator = format_value(financial_analysis_indicator.iloc[-1].to_dict())
-                
-                def safe_isnan(x):
-                    try:
-                        return math.isnan(x)
-                    except:
-                        return False
-                
-                fundamental_data['financial_indicators'] = {
-                    k: v for k, v in latest_financial_analysis_indicator.items()
-                    if v not in [0, None, 'nan', -1] and not safe_isnan(v)
-                }
+                    fundamental_data['financial_indicators'] = extract_financial_indicators(financial_analysis_indicator.iloc[-1].to_dict())
+                else:
+                    fundamental_data['financial_indicators'] = {}
                 logger.info(f"获取到{len(fundamental_data['financial_indicators'].keys())}条财务分析指标")
                 
             except Exception as e:
@@ -219,14 +266,7 @@ class WebStockAnalyzer:
             # 4. 业绩预告和业绩快报
             try:
                 logger.info("正在获取业绩报表...")
-                if current_time.month <= 3:
-                    query_time = [f"{current_time.year-1}1231", f"{current_time.year-1}0930", f"{current_time.year-1}0630", f"{current_time.year-1}0331"]
-                elif current_time.month <= 6:
-                    query_time = [f"{current_time.year}0331", f"{current_time.year-1}1231", f"{current_time.year-1}0930", f"{current_time.year-1}0630"]
-                elif current_time.month <= 9:
-                    query_time = [f"{current_time.year}0630", f"{current_time.year}0331", f"{current_time.year-1}1231", f"{current_time.year-1}0930"]
-                else:
-                    query_time = [f"{current_time.year}0930", f"{current_time.year}0630", f"{current_time.year}0331", f"{current_time.year-1}1231"]
+                query_time = _quarter_candidates(current_time.year, current_time.month)
                 for t in query_time:
                     time.sleep(1)
                     performance_forecast = ak.stock_yjbb_em(t)
@@ -269,7 +309,7 @@ class WebStockAnalyzer:
                 fundamental_data['industry_analysis'] = {}
             
             # 缓存数据
-            self.fundamental_cache[stock_code] = (datetime.now(), fundamental_data)
+            self.fundamental_cache[stock_code] = (current_time, fundamental_data)
             logger.info(f"✓ {stock_code} 综合基本面数据获取完成并已缓存")
             
             return fundamental_data
@@ -292,7 +332,7 @@ class WebStockAnalyzer:
 
             # 获取行业信息
             try:
-                industry_info = ak.stock_board_industry_name_em()
+                industry_info = self._get_industry_board_data()
                 stock_industry_info = industry_info[industry_info["板块名称"] == industry_name].iloc[0].to_dict()
                 industry_data['industry_info'] = format_value(stock_industry_info)
             except Exception as e:
@@ -301,7 +341,7 @@ class WebStockAnalyzer:
             
             try:
                 # 获取行业市盈率
-                stock_board_industry_cons_em_df = ak.stock_board_industry_cons_em(symbol=industry_name)
+                stock_board_industry_cons_em_df = self._get_industry_cons_data(industry_name)
                 stock_pe_info = format_value(stock_board_industry_cons_em_df[stock_board_industry_cons_em_df["代码"] == stock_code].iloc[0].to_dict())
                 stock_name = stock_pe_info["名称"]
                 industry_data['industry_pe_info'] = {
@@ -327,12 +367,39 @@ class WebStockAnalyzer:
             logger.warning(f"行业分析失败: {e}")
             return {}
 
+    def _get_industry_board_data(self) -> pd.DataFrame:
+        """获取全部行业板块数据（带缓存）"""
+        now = datetime.now()
+        if self.industry_board_cache is not None:
+            cache_time, data = self.industry_board_cache
+            if now - cache_time < self.fundamental_cache_duration:
+                return data
+        
+        data = ak.stock_board_industry_name_em()
+        self.industry_board_cache = (now, data)
+        return data
+
+    def _get_industry_cons_data(self, industry_name:str) -> pd.DataFrame:
+        """获取行业成分股数据（带缓存）"""
+        now = datetime.now()
+        cached = self.industry_cons_cache.get(industry_name)
+        if cached is not None:
+            cache_time, data = cached
+            if now - cache_time < self.fundamental_cache_duration:
+                logger.info(f"使用缓存的行业成分股数据: {industry_name}")
+                return data
+        
+        data = ak.stock_board_industry_cons_em(symbol=industry_name)
+        self.industry_cons_cache.put(industry_name, (now, data))
+        return data
+
     def get_comprehensive_news_data(self, stock_code:str, days:int=15) -> dict:
         """获取综合新闻数据（修正版本）"""
+        now = datetime.now()
         cache_key = f"{stock_code}_{days}"
         if cache_key in self.news_cache:
             cache_time, data = self.news_cache[cache_key]
-            if datetime.now() - cache_time < self.news_cache_duration:
+            if now - cache_time < self.news_cache_duration:
                 logger.info(f"使用缓存的新闻数据: {stock_code}")
                 return data
         
@@ -399,14 +466,14 @@ class WebStockAnalyzer:
                     'total_news_count': total_news,
                     'company_news_count': len(all_news_data['company_news']),
                     'research_reports_count': len(all_news_data['research_reports']),
-                    'data_freshness': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    'data_freshness': now.strftime('%Y-%m-%d %H:%M:%S')
                 }
                 
             except Exception as e:
                 logger.warning(f"生成新闻摘要失败: {e}")
             
             # 缓存数据
-            self.news_cache[cache_key] = (datetime.now(), all_news_data)
+            self.news_cache[cache_key] = (now, all_news_data)
             
             logger.info(f"✓ 综合新闻数据获取完成，总计 {all_news_data['news_summary'].get('total_news_count', 0)} 条")
             return all_news_data
@@ -446,24 +513,9 @@ class WebStockAnalyzer:
                     'total_analyzed': -1
                 }
             
-            # 扩展的情绪词典
-            positive_words = {
-                '上涨', '涨停', '利好', '突破', '增长', '盈利', '收益', '回升', '强势', '看好',
-                '买入', '推荐', '优秀', '领先', '创新', '发展', '机会', '潜力', '稳定', '改善',
-                '提升', '超预期', '积极', '乐观', '向好', '受益', '龙头', '热点', '爆发', '翻倍',
-                '业绩', '增收', '扩张', '合作', '签约', '中标', '获得', '成功', '完成', '达成'
-            }
-            
-            negative_words = {
-                '下跌', '跌停', '利空', '破位', '下滑', '亏损', '风险', '回调', '弱势', '看空',
-                '卖出', '减持', '较差', '落后', '滞后', '困难', '危机', '担忧', '悲观', '恶化',
-                '下降', '低于预期', '消极', '压力', '套牢', '被套', '暴跌', '崩盘', '踩雷', '退市',
-                '违规', '处罚', '调查', '停牌', '亏损', '债务', '违约', '诉讼', '纠纷', '问题'
-            }
-            
             # 分析每类新闻的情绪
-            sentiment_by_type = {}
             overall_scores = []
+            score_types = []
             
             for text_data in all_texts:
                 try:
@@ -474,8 +526,8 @@ class WebStockAnalyzer:
                     if not text.strip():
                         continue
                     
-                    positive_count = sum(1 for word in positive_words if word in text)
-                    negative_count = sum(1 for word in negative_words if word in text)
+                    positive_count = sum(1 for word in POSITIVE_WORDS if word in text)
+                    negative_count = sum(1 for word in NEGATIVE_WORDS if word in text)
                     
                     # 计算情绪得分
                     total_sentiment_words = positive_count + negative_count
@@ -487,22 +539,26 @@ class WebStockAnalyzer:
                     # 应用权重
                     weighted_score = sentiment_score * weight
                     overall_scores.append(weighted_score)
-                    
-                    # 按类型统计
-                    if text_type not in sentiment_by_type:
-                        sentiment_by_type[text_type] = []
-                    sentiment_by_type[text_type].append(weighted_score)
+                    score_types.append(text_type)
                     
                 except Exception as e:
                     continue
             
-            # 计算总体情绪
-            overall_sentiment = sum(overall_scores) / len(overall_scores) if overall_scores else -1
-            
-            # 计算各类型平均情绪
-            avg_sentiment_by_type = {}
-            for text_type, scores in sentiment_by_type.items():
-                avg_sentiment_by_type[text_type] = sum(scores) / len(scores) if scores else -1
+            # 计算总体情绪及各类型平均情绪
+            if overall_scores:
+                scores = np.asarray(overall_scores, dtype=np.float64)
+                grouped = pd.Series(scores).groupby(np.asarray(score_types), sort=False)
+                overall_sentiment = float(scores.mean())
+                avg_sentiment_by_type = grouped.mean().to_dict()
+                type_distribution = {k: int(v) for k, v in grouped.size().items()}
+                positive_ratio = float((scores > 0).mean())
+                negative_ratio = float((scores < 0).mean())
+            else:
+                overall_sentiment = -1
+                avg_sentiment_by_type = {}
+                type_distribution = {}
+                positive_ratio = 0
+                negative_ratio = 0
             
             # 判断情绪趋势
             if overall_sentiment > 0.3:
@@ -525,9 +581,9 @@ class WebStockAnalyzer:
                 'sentiment_trend': sentiment_trend,
                 'confidence_score': confidence_score,
                 'total_analyzed': len(all_texts),
-                'type_distribution': {k: len(v) for k, v in sentiment_by_type.items()},
-                'positive_ratio': len([s for s in overall_scores if s > 0]) / len(overall_scores) if overall_scores else 0,
-                'negative_ratio': len([s for s in overall_scores if s < 0]) / len(overall_scores) if overall_scores else 0
+                'type_distribution': type_distribution,
+                'positive_ratio': positive_ratio,
+                'negative_ratio': negative_ratio
             }
             
             logger.info(f"✓ 高级情绪分析完成: {sentiment_trend} (得分: {overall_sentiment:.3f})")
@@ -562,6 +618,19 @@ class WebStockAnalyzer:
         self.config.streaming.enabled = enabled
         self.config.streaming.show_thinking = show_thinking
 
+    def _get_price_analysis(self, stock_code:str, price_data:pd.DataFrame) -> tuple:
+        """计算价格信息、技术指标和K线表格，价格数据未刷新时使用缓存结果"""
+        cached = self.price_analysis_cache.get(stock_code)
+        if cached is not None:
+            cached_data, result = cached
+            # price_cache 命中时返回的是同一个DataFrame对象
+            if cached_data is price_data:
+                return result
+        
+        result = (get_price_info(price_data), calculate_technical_indicators(price_data), get_K_graph_table(price_data))
+        self.price_analysis_cache.put(stock_code, (price_data, result))
+        return result
+    
     def analyze_stock(self, stock_code:str, position_percent:float=0, avg_price:float=-1, enable_streaming:bool=False, streamer:StreamingSender=None):
         """分析股票的主方法（修正版，支持AI流式输出）"""
         try:
@@ -569,33 +638,41 @@ class WebStockAnalyzer:
             if streamer:
                 streamer.send_progress('singleProgress', 5, "正在获取股票基本信息...")
             
-            # 获取股票名称
-            stock_name = self.get_stock_name(stock_code)
-            
-            # 获取价格数据和技术分析
-            logger.info("正在进行技术分析...")
-            price_data = self.get_stock_data(stock_code)
-            if price_data.empty:
-                raise ValueError(f"无法获取股票 {stock_code} 的价格数据")
-            
-            price_info = get_price_info(price_data)
-            technical_analysis = calculate_technical_indicators(price_data)
-            if streamer:
-                streamer.send_partial_result({
-                    'type': 'basic_info',
-                    'stock_code': stock_code,
-                    'stock_name': stock_name,
-                    'current_price': price_info['current_price'],
-                    'price_change': price_info['price_change']
-                })
-            
-            # 获取财务指标和综合基本面分析
-            logger.info("正在进行财务指标分析...")
-            fundamental_data = self.get_comprehensive_fundamental_data(stock_code)
-            
-            # 获取综合新闻数据和高级情绪分析
-            logger.info("正在进行综合新闻和情绪分析...")
-            comprehensive_news_data = self.get_comprehensive_news_data(stock_code, days=30)
+            # 基本面和新闻数据与价格数据互不依赖，提前在后台并发获取
+            fundamental_future = self.fetch_pool.submit(self.get_comprehensive_fundamental_data, stock_code)
+            news_future = self.fetch_pool.submit(self.get_comprehensive_news_data, stock_code, 30)
+            try:
+                # 获取股票名称
+                stock_name = self.get_stock_name(stock_code)
+                
+                # 获取价格数据和技术分析
+                logger.info("正在进行技术分析...")
+                price_data = self.get_stock_data(stock_code)
+                if price_data.empty:
+                    raise ValueError(f"无法获取股票 {stock_code} 的价格数据")
+                
+                price_info, technical_analysis, K_graph_table = self._get_price_analysis(stock_code, price_data)
+                if streamer:
+                    streamer.send_partial_result({
+                        'type': 'basic_info',
+                        'stock_code': stock_code,
+                        'stock_name': stock_name,
+                        'current_price': price_info['current_price'],
+                        'price_change': price_info['price_change']
+                    })
+                
+                # 获取财务指标和综合基本面分析
+                logger.info("正在进行财务指标分析...")
+                fundamental_data = fundamental_future.result()
+                
+                # 获取综合新闻数据和高级情绪分析
+                logger.info("正在进行综合新闻和情绪分析...")
+                comprehensive_news_data = news_future.result()
+            except Exception:
+                # 分析提前失败时，取消尚未开始的获取任务
+                fundamental_future.cancel()
+                news_future.cancel()
+                raise
             sentiment_analysis = self.calculate_advanced_sentiment_analysis(comprehensive_news_data)
             
             # 合并新闻数据到情绪分析结果中，方便AI分析使用
@@ -610,11 +687,11 @@ class WebStockAnalyzer:
                 streamer.send_data_quality(data_quality)
             
             # AI分析
-            no_thinking_config = analyzer.config.generation.model_copy()
-            no_thinking_config.extra_parm = {"chat_template_kwargs": {"enable_thinking": False}}
+            generation_config = self.config.generation
+            no_thinking_config = self._no_thinking_generation
             if streamer:
                 streamer.send_progress('singleProgress', 20, "正在分析K线图...")
-            _, K_graph_conclusion = k_graph_analysis(stock_name, get_K_graph_table(price_data), no_thinking_config)
+            _, K_graph_conclusion = k_graph_analysis(stock_name, K_graph_table, no_thinking_config)
             if streamer:
                 streamer.send_progress('singleProgress', 40, "正在分析相关新闻...")
             _, news_summary = news_summarize(stock_name, sentiment_analysis, no_thinking_config)
@@ -633,19 +710,19 @@ class WebStockAnalyzer:
                 "news_summary": news_summary,
                 "K_graph_conclusion": K_graph_conclusion,
                 "value_analysis": value_analysis
-            }, analyzer.config.generation, enable_streaming, streamer)
+            }, generation_config, enable_streaming, streamer)
             
             # 生成最终报告
             report = {
                 'stock_code': stock_code,
                 'stock_name': stock_name,
-                'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'analysis_date': now_str(),
                 'price_info': price_info,
                 'technical_analysis': technical_analysis,
                 'fundamental_data': fundamental_data,
                 'comprehensive_news_data': comprehensive_news_data,
                 'sentiment_analysis': sentiment_analysis,
-                'analysis_weights': self.config.analysis_weights.model_dump(),
+                'analysis_weights': self._weights_dump,
                 'ai_analysis': ai_analysis,
                 'data_quality': data_quality,
                 "value_prompt": value_prompt,
@@ -653,7 +730,7 @@ class WebStockAnalyzer:
             }
             if streamer:
                 streamer.send_progress('singleProgress', 100, "分析完成")
-                streamer.send_final_result(report)
+                streamer.send_final_result({k: v for k, v in report.items() if k not in STREAMED_REPORT_KEYS})
                 streamer.send_completion(f"✅ {stock_code} 流式分析完成")
 
             logger.info(f"✓ 增强版股票分析完成: {stock_code}")
@@ -667,25 +744,75 @@ class WebStockAnalyzer:
     def analyze_stock_with_streaming(self, stock_code:str, position_percent:float=0, avg_price:float=-1, streamer:StreamingSender=None):
         return self.analyze_stock(stock_code, position_percent, avg_price, True, streamer)
     
+    def _get_batch_report(self, stock_code:str) -> dict:
+        """获取批量分析报告（带缓存）"""
+        now = datetime.now()
+        cached = self.report_cache.get(stock_code)
+        if cached is not None:
+            cache_time, report = cached
+            if now - cache_time < self.report_cache_duration:
+                logger.info(f"使用缓存的分析报告: {stock_code}")
+                return report
+            # 过期的报告直接移除，不再占用内存
+            self.report_cache.pop(stock_code)
+        
+        future = Future()
+        inflight = self._inflight_reports.setdefault(stock_code, future)
+        if inflight is not future:
+            return inflight.result()
+        
+        try:
+            report = self.report_store.load(stock_code)
+            if report is not None:
+                logger.info(f"使用磁盘缓存的分析报告: {stock_code}")
+            else:
+                report = self.analyze_stock(stock_code)
+                self.report_store.save(stock_code, report)
+            self.report_cache.put(stock_code, (datetime.now(), report))
+            future.set_result(report)
+            return report
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight_reports.pop(stock_code, None)
+    
     def analyze_batch_streaming(self, stock_codes:list[str], client_id:str):
-        streamer = StreamingSender(client_id, sse_manager)
+        total_stocks = len(stock_codes)
+        max_workers = max(1, min(self.config.analysis_params.batch_workers, total_stocks))
+        # 有界发送队列：待发送的报告最多保留 2 倍并发数，避免批量报告在内存中堆积
+        streamer = StreamingSender(client_id, sse_manager, max_pending=max_workers * 2)
         try:
-            total_stocks = len(stock_codes)
             streamer.send_log(f"📊 开始流式批量分析 {total_stocks} 只股票", 'header')
             failed_stocks = []
-            for i, stock_code in enumerate(stock_codes):
+            
+            def _run_one(i:int, stock_code:str):
                 try:
-                    progress = int((i / total_stocks) * 100)
-                    streamer.send_progress('batchProgress', progress, 
-                        f"正在分析第 {i+1}/{total_stocks} 只股票", stock_code)
-                    
-                    report = self.analyze_stock(stock_code)
-                    streamer.send_batch_result(i, report)
-                    streamer.send_log(f"{stock_code} 分析完成", 'success')
-        
+                    return i, stock_code, self._get_batch_report(stock_code)
                 except Exception as e:
-                    failed_stocks.append(stock_code)
-                    streamer.send_log(f"{stock_code} 分析失败: {e}", 'error')       
+                    return i, stock_code, e
+            
+            # 各股票分析以网络I/O为主，使用线程池并发执行，按完成顺序推送结果
+            # 不保留 future 列表，报告发送后即可释放
+            last_sent_at = 0.0
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                pending = as_completed([pool.submit(_run_one, i, stock_code) for i, stock_code in enumerate(stock_codes)])
+                for completed, future in enumerate(pending, 1):
+                    i, stock_code, result = future.result()
+                    if isinstance(result, Exception):
+                        failed_stocks.append(stock_code)
+                        streamer.send_log(f"{stock_code} 分析失败: {result}", 'error')
+                    else:
+                        streamer.send_batch_result(i, result)
+                        streamer.send_log(f"{stock_code} 分析完成", 'success')
+                    
+                    # 合并进度更新：距上次发送超过0.1秒才发送，期间完成的股票并入下一次进度；100%由循环结束后统一发送
+                    progress = int((completed / total_stocks) * 100)
+                    now = time.monotonic()
+                    if progress < 100 and now - last_sent_at > 0.1:
+                        streamer.send_progress('batchProgress', progress, 
+                            f"已完成 {completed}/{total_stocks} 只股票", stock_code)
+                        last_sent_at = now
         
             streamer.send_progress('batchProgress', 100, f"批量分析完成")
             message = f"🎉 批量分析完成！成功分析 {total_stocks - len(failed_stocks)}/{total_stocks} 只股票"
@@ -699,8 +826,8 @@ class WebStockAnalyzer:
             streamer.send_log(f"{error_msg}", 'error')
             streamer.send_completion()
             raise
-        
-                
+        finally:
+            streamer.close()
     
 def init_analyzer(config_path:str) -> WebStockAnalyzer:
     """初始化分析器"""
@@ -708,6 +835,8 @@ def init_analyzer(config_path:str) -> WebStockAnalyzer:
     try:
         logger.info("正在初始化WebStockAnalyzer...")
         analyzer = WebStockAnalyzer(config_path)
+        # 后台预热技术指标内核，不阻塞启动
+        threading.Thread(target=warmup_indicator_kernels, name="indicator-warmup", daemon=True).start()
         logger.info("✅ WebStockAnalyzer初始化成功")
         return analyzer
     except Exception as e:
@@ -1,21 +1,26 @@
+import numpy as np
 import pandas as pd
-import datetime
 
-from app.utils.format_utils import format_dict_data, format_list_data
+from app.utils.format_utils import format_dict_data, format_list_data, now_str
 
 MAX_LIST_ITEMS = 5
 
+def _fmt(value, spec:str, default:str='未知') -> str:
+    """按格式说明格式化数值，缺失或非数值时返回原值/默认值"""
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        # 整数不支持带精度的格式说明（如 '.4'），统一转为float再格式化
+        return format(float(value), spec)
+    return default if value is None else str(value)
+
 def _build_financial_section(financial_indicators: dict) -> str:
     if not financial_indicators:
         return ""
     
-    lines = ["# 核心财务指标"]
-    for i, (key, value) in enumerate(financial_indicators.items(), 1):
-        if isinstance(value, (int, float)) and value != -1:
-            lines.append(f"{i}. {key}: {value}")
-    if len(lines) == 1:
+    lines = [f"{i}. {key}: {value}" for i, (key, value) in enumerate(financial_indicators.items(), 1)
+             if isinstance(value, (int, float)) and value != -1]
+    if not lines:
         return ""
-    return "\n".join(lines)
+    return "\n".join(["# 核心财务指标", *lines])
 
 def build_news_section(company_news: list, research_reports: list) -> str:
     news_text = [
@@ -25,18 +30,16 @@ def build_news_section(company_news: list, research_reports: list) -> str:
         "",
         "### 重要新闻标题："
     ]
-    for i, news in enumerate(company_news, 1):
-        news_text.append(f"{i}.{news['date']} -> {news['title']}")
+    news_text.extend(f"{i}.{cn.get('date', '-')} -> {cn['title']}" for i, cn in enumerate(company_news, 1))
     
     if research_reports:
         news_text.append("\n### 研究报告标题：")
-        for i, report in enumerate(research_reports, 1):
-            news_text.append(f"{i}.{news['date']} -> {report['institution']}: {report['rating']} - {report['title']}")
+        news_text.extend(f"{i}.{rr.get('date', '-')} -> {rr['institution']}: {rr['rating']} - {rr['title']}"
+                         for i, rr in enumerate(research_reports, 1))
     
     return "\n".join(news_text)
 
-def _get_analysis_instruction():
-    return """# 分析要求
+_ANALYSIS_INSTRUCTION = """# 分析要求
 
 请基于以上详细数据，从以下维度进行深度分析：
 
@@ -74,26 +77,15 @@ def _get_analysis_instruction():
 请用专业、客观的语言进行分析，确保逻辑清晰、数据支撑充分、结论明确可执行。"""
 
 
-def build_enhanced_ai_analysis_prompt(
-    stock_code: str, stock_name: str, technical_analysis: dict, fundamental_data: dict,
-    news_summary: str, price_info: dict, K_graph_description: str, value_analysis: str,
-    avg_price: float, position_percent: float
-) -> str:
-
-    if position_percent > 0:
-        user_info = f'''* 成本价：{avg_price}
-* 当前仓位：{position_percent}%'''
-    else:
-        user_info = "当前未持有"
-    
-    prompt = f"""你是一位资深的股票分析师，当前时间为{datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}，基于以下详细数据对股票进行深度分析：
+# 提示词模板在导入时构建一次，调用时只需填充字段
+_ENHANCED_ANALYSIS_TEMPLATE = """你是一位资深的股票分析师，当前时间为{now}，基于以下详细数据对股票进行深度分析：
 # 股票基本信息
 * 股票代码：{stock_code}
 * 股票名称：{stock_name}
-* 当前价格：{price_info.get('current_price', '未知'):5.5}元
-* 涨跌幅：{price_info.get('price_change', '未知'):5.5}%
-* 成交量比率：{price_info.get('volume_ratio', '未知'):5.5}
-* 波动率：{price_info.get('volatility', '未知'):5.5}%
+* 当前价格：{current_price}元
+* 涨跌幅：{price_change}%
+* 成交量比率：{volume_ratio}
+* 波动率：{volatility}%
 
 # 用户信息
 {user_info}
@@ -102,29 +94,26 @@ def build_enhanced_ai_analysis_prompt(
 {K_graph_description}
 
 # 技术分析详情：
-* 均线趋势：ExpMA5:{technical_analysis.get('ma5', '未知'):.4} ExpMA10:{technical_analysis.get('ma10', '未知'):.4} ExpMA20:{technical_analysis.get('ma20', '未知'):.4} ExpMA60:{technical_analysis.get('ma60', '未知'):.4}
-* RSI指标：{technical_analysis.get('rsi', '未知'):5.5}
-* MACD信号：{technical_analysis.get('macd_signal', '未知')} dif:{technical_analysis.get('dif', '未知'):.3} dea:{technical_analysis.get('dea', '未知'):.3}
-* 布林带位置：{technical_analysis.get('bb_position', '未知'):5.5}
-* 成交量状态：{technical_analysis.get('volume_status', '未知')}
+* 均线趋势：ExpMA5:{ma5} ExpMA10:{ma10} ExpMA20:{ma20} ExpMA60:{ma60}
+* RSI指标：{rsi}
+* MACD信号：{macd_signal} dif:{dif} dea:{dea}
+* 布林带位置：{bb_position}
+* 成交量状态：{volume_status}
 
 # 价值分析
 {value_analysis}
 
 # 行业信息
-{fundamental_data.get('industry_analysis', {})}
+{industry_analysis}
 
 # 公司新闻、公告
 {news_summary}
 
-{_get_analysis_instruction()}"""
-
-    return prompt
+{analysis_instruction}"""
 
-def build_K_graph_table_prompt(stock_name:str, K_graph_table:pd.DateOffset) -> str:
-    prompt = f'''请作为一位资深的股票分析师，当前时间为{datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}，基于{stock_name}30个交易日内的股票开盘价（open），收盘价（close），最高价（high）和最低价（low），来进行深度地分析
+_K_GRAPH_TABLE_TEMPLATE = '''请作为一位资深的股票分析师，当前时间为{now}，基于{stock_name}30个交易日内的股票开盘价（open），收盘价（close），最高价（high）和最低价（low），来进行深度地分析
 表格如下
-{str(K_graph_table)}
+{K_graph_table}
 你首先需要对这个表格的内容进行描述；
 注意，请直接输出描述与分析，不需要添加包括建议及技术指标在内的任何额外内容！
 需要包含以下几个章节：
@@ -132,10 +121,8 @@ def build_K_graph_table_prompt(stock_name:str, K_graph_table:pd.DateOffset) -> s
 ## 最高点与最低点
 ## 当前趋势
 '''
-    return prompt
 
-def build_news_summary_prompt(stock_name:str, news:str) -> str:
-    prompt = f'''请作为一位资深的股票分析师，当前时间为{datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}，请你对{stock_name}近期的新闻、报告进行一次总结
+_NEWS_SUMMARY_TEMPLATE = '''请作为一位资深的股票分析师，当前时间为{now}，请你对{stock_name}近期的新闻、报告进行一次总结
 新闻内容如下
 {news}
 由于股票中的新闻具有很强的时效性，请尽量保留时间信息；
@@ -146,33 +133,30 @@ def build_news_summary_prompt(stock_name:str, news:str) -> str:
 ## 研究报告摘要
 ## 市场环境
 '''
-    return prompt
 
-def build_value_prompt(stock_code: str, stock_name: str, fundamental_data: dict, price_info: dict) -> str:
-    financial_text = _build_financial_section(fundamental_data.get('financial_indicators', {}))
-    prompt = f"""你是一位资深的股票分析师，当前时间为{datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}，基于以下详细数据对股票进行深度分析：
+_VALUE_TEMPLATE = """你是一位资深的股票分析师，当前时间为{now}，基于以下详细数据对股票进行深度分析：
 # 股票基本信息
 * 股票代码：{stock_code}
 * 股票名称：{stock_name}
-* 当前价格：{price_info.get('current_price', '未知'):5.5}元
-* 涨跌幅：{price_info.get('price_change', '未知'):5.5}%
-* 成交量比率：{price_info.get('volume_ratio', '未知'):5.5}
-* 波动率：{price_info.get('volatility', '未知'):5.5}%
+* 当前价格：{current_price}元
+* 涨跌幅：{price_change}%
+* 成交量比率：{volume_ratio}
+* 波动率：{volatility}%
 
 {financial_text}
 
 # 估值指标
-{format_dict_data(fundamental_data.get('valuation', {}))}
+{valuation}
 
 # 业绩报表
-{fundamental_data.get('performance_repo')}
+{performance_repo}
 
 # 分红配股
-共{min(len(fundamental_data.get('dividend_info', [])), MAX_LIST_ITEMS)}条分红配股信息
-{format_list_data(fundamental_data.get('dividend_info', [])[:MAX_LIST_ITEMS], 20)}
+共{dividend_count}条分红配股信息
+{dividend_info}
 
 # 行业信息
-{fundamental_data.get('industry_analysis', {})}
+{industry_analysis}
 
 请基于以上信息，分析公司的财务状况与分红政策，最后给出综合价值判断；
 注意，你只能使用已经提供的信息或通过已有信息可以推断出的额外信息，不要使用任何没有来源的数据！
@@ -182,4 +166,64 @@ def build_value_prompt(stock_code: str, stock_name: str, fundamental_data: dict,
 ## 分红政策
 ## 价值判断"""
 
-    return prompt
\ No newline at end of file
+def build_enhanced_ai_analysis_prompt(
+    stock_code: str, stock_name: str, technical_analysis: dict, fundamental_data: dict,
+    news_summary: str, price_info: dict, K_graph_description: str, value_analysis: str,
+    avg_price: float, position_percent: float
+) -> str:
+
+    if position_percent > 0:
+        user_info = f'''* 成本价：{avg_price}
+* 当前仓位：{position_percent}%'''
+    else:
+        user_info = "当前未持有"
+    
+    return _ENHANCED_ANALYSIS_TEMPLATE.format(
+        now=now_str(),
+        stock_code=stock_code,
+        stock_name=stock_name,
+        current_price=_fmt(price_info.get('current_price'), '5.5'),
+        price_change=_fmt(price_info.get('price_change'), '5.5'),
+        volume_ratio=_fmt(price_info.get('volume_ratio'), '5.5'),
+        volatility=_fmt(price_info.get('volatility'), '5.5'),
+        user_info=user_info,
+        K_graph_description=K_graph_description,
+        ma5=_fmt(technical_analysis.get('ma5'), '.4'),
+        ma10=_fmt(technical_analysis.get('ma10'), '.4'),
+        ma20=_fmt(technical_analysis.get('ma20'), '.4'),
+        ma60=_fmt(technical_analysis.get('ma60'), '.4'),
+        rsi=_fmt(technical_analysis.get('rsi'), '5.5'),
+        macd_signal=technical_analysis.get('macd_signal', '未知'),
+        dif=_fmt(technical_analysis.get('dif'), '.3'),
+        dea=_fmt(technical_analysis.get('dea'), '.3'),
+        bb_position=_fmt(technical_analysis.get('bb_position'), '5.5'),
+        volume_status=technical_analysis.get('volume_status', '未知'),
+        value_analysis=value_analysis,
+        industry_analysis=fundamental_data.get('industry_analysis', {}),
+        news_summary=news_summary,
+        analysis_instruction=_ANALYSIS_INSTRUCTION,
+    )
+
+def build_K_graph_table_prompt(stock_name:str, K_graph_table:pd.DateOffset) -> str:
+    return _K_GRAPH_TABLE_TEMPLATE.format(now=now_str(), stock_name=stock_name, K_graph_table=str(K_graph_table))
+
+def build_news_summary_prompt(stock_name:str, news:str) -> str:
+    return _NEWS_SUMMARY_TEMPLATE.format(now=now_str(), stock_name=stock_name, news=news)
+
+def build_value_prompt(stock_code: str, stock_name: str, fundamental_data: dict, price_info: dict) -> str:
+    dividend_info = fundamental_data.get('dividend_info', [])
+    return _VALUE_TEMPLATE.format(
+        now=now_str(),
+        stock_code=stock_code,
+        stock_name=stock_name,
+        current_price=_fmt(price_info.get('current_price'), '5.5'),
+        price_change=_fmt(price_info.get('price_change'), '5.5'),
+        volume_ratio=_fmt(price_info.get('volume_ratio'), '5.5'),
+        volatility=_fmt(price_info.get('volatility'), '5.5'),
+        financial_text=_build_financial_section(fundamental_data.get('financial_indicators', {})),
+        valuation=format_dict_data(fundamental_data.get('valuation', {})),
+        performance_repo=fundamental_data.get('performance_repo'),
+        dividend_count=min(len(dividend_info), MAX_LIST_ITEMS),
+        dividend_info=format_list_data(dividend_info[:MAX_LIST_ITEMS], 20),
+        industry_analysis=fundamental_data.get('industry_analysis', {}),
+    )
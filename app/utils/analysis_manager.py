@@ -1,31 +1,24 @@
-import threading
-from datetime import datetime
+import time
 
 class AnalysisManager:
     def __init__(self):
-        self.lock = threading.Lock()
+        # 单键的增删查依赖dict操作在GIL下的原子性，无需加锁
         self.tasks = {}
 
     def add_task(self, stock_code:str, client_id:str) -> bool:
-        with self.lock:
-            if stock_code in self.tasks:
-                return False  # 已存在
-            self.tasks[stock_code] = {
-                'start_time': datetime.now(),
-                'status': 'analyzing',
-                'client_id': client_id
-            }
-            return True
+        claim = {
+            'start_time': time.monotonic(),
+            'status': 'analyzing',
+            'client_id': client_id
+        }
+        # setdefault 原子地完成"检查并插入"
+        return self.tasks.setdefault(stock_code, claim) is claim
 
     def remove_task(self, stock_code):
-        with self.lock:
-            self.tasks.pop(stock_code, None)
+        self.tasks.pop(stock_code, None)
 
     def is_task_running(self, stock_code):
-        with self.lock:
-            return stock_code in self.tasks
+        return stock_code in self.tasks
         
     def __len__(self):
-        with self.lock:
-            return len(self.tasks.keys())
-
+        return len(self.tasks)
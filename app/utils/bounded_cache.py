@@ -0,0 +1,32 @@
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """容量有限的缓存，超出容量时淘汰最久未使用的条目"""
+
+    def __init__(self, max_entries:int):
+        self.max_entries = max(1, max_entries)
+        self._data = OrderedDict()
+        # move_to_end 与 popitem 组合操作不是原子的，多个分析线程并发访问时需要加锁
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def __len__(self):
+        return len(self._data)
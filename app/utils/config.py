@@ -23,6 +23,10 @@ class CacheConfig(BaseModel):
     price_hours: int = 6
     fundamental_hours: int = 6
     news_hours: int = 2
+    report_seconds: int = 60
+    report_dir: str = "~/.cache/stock-scanner/reports"
+    # 派生指标、行业成分股等内存缓存的最大条目数，超出后淘汰最久未使用的条目
+    max_entries: int = 512
     
 class StreamingConfig(BaseModel):
     enabled: bool = False
@@ -33,6 +37,9 @@ class AnalysisParams(BaseModel):
     max_news_count: int = 100
     technical_period_days: int = 180
     financial_indicators_count: int = 25
+    batch_workers: int = 4
+    # 基本面与新闻数据后台获取的共享线程数，建议为 batch_workers 的2倍
+    fetch_workers: int = 8
 
 class WebAuth(BaseModel):
     enabled: bool = False
@@ -64,7 +71,7 @@ def load_config(config_file:str) -> WebConfig:
             with open(config_file, 'r', encoding='utf-8') as f:
                 config = json.load(f)
             logger.info(f"✅ 成功加载配置文件: {config_file}")
-            return WebConfig.model_validate_json(json.dumps(config))
+            return WebConfig.model_validate(config)
         else:
             logger.warning(f"⚠️ 配置文件 {config_file} 不存在，使用默认配置")
             default_config = get_default_config()
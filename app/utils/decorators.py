@@ -1,4 +1,4 @@
-from datetime import datetime
+import time
 from flask import session, redirect, url_for
 
 from functools import wraps
@@ -8,10 +8,9 @@ def require_auth(f):
     """鉴权装饰器"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        analyzer = get_analyzer()
-        auth_enabled = analyzer.config.web_auth.enabled
+        web_auth = get_analyzer().config.web_auth
         
-        if not auth_enabled:
+        if not web_auth.enabled:
             return f(*args, **kwargs)
         
         # 检查session中是否已认证
@@ -19,8 +18,7 @@ def require_auth(f):
             # 检查session是否过期
             login_time = session.get('login_time')
             if login_time:
-                session_timeout = analyzer.config.web_auth.session_timeout
-                if (datetime.now() - datetime.fromisoformat(login_time)).total_seconds() < session_timeout:
+                if time.time() - login_time < web_auth.session_timeout:
                     return f(*args, **kwargs)
                 else:
                     session.pop('authenticated', None)
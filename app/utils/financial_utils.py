@@ -1,29 +1,68 @@
-import math
+import numpy as np
 import pandas as pd
 import datetime
+import importlib.util
+from functools import lru_cache
 
 from app.logger import logger
 
+# numba为可选依赖，未安装时使用pandas实现；这里只检查是否存在，真正导入推迟到首次使用
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+# 未安装numba时，若有scipy则用 lfilter 计算EMA
+HAS_SCIPY = importlib.util.find_spec("scipy") is not None
+
+_INF = float('inf')
+_NEG_INF = float('-inf')
+_NUMBER_TYPES = (int, float, np.integer, np.floating)
+# 数据源中表示缺失值的占位字符串
+_BAD_VALUES = frozenset(('', 'nan', 'none', '--'))
+
 # 安全的数值处理函数
 def safe_float(value:float, default:float=-1) -> float:
+    # 原生float最常见，直接判断；num_value != num_value 即为NaN，避免 math.isnan/isinf 的函数调用
+    if type(value) is float:
+        return default if (value != value or value == _INF or value == _NEG_INF) else value
+    if value is None:
+        return default
     try:
-        if pd.isna(value):
-            return default
+        # numpy/pandas标量经float()转换后同样用上面的判断，pd.NA等无法转换的缺失值会抛TypeError
         num_value = float(value)
-        if math.isnan(num_value) or math.isinf(num_value):
-            return default
-        return num_value
     except (ValueError, TypeError):
         return default
+    return default if (num_value != num_value or num_value == _INF or num_value == _NEG_INF) else num_value
 
 # 从原始数据中安全获取数值
 def safe_get(raw_dict:dict, key, default:float=-1) -> float:
-    value = raw_dict.get(key, default)
-    try:
-        return safe_float(value, default)
-    except (ValueError, TypeError):
-        return default
-    
+    # safe_float 内部已处理所有转换异常，这里无需再包一层 try；缺失键得到None，同样返回默认值
+    return safe_float(raw_dict.get(key), default)
+
+def _is_valid_indicator(value) -> bool:
+    """判断财务指标取值是否有效（非空、非NaN/Inf、非0/-1）"""
+    if isinstance(value, _NUMBER_TYPES):
+        # 0为假值直接短路；value != value 即为NaN
+        return bool(value) and not (value != value or value == _INF or value == _NEG_INF or value == -1)
+    if isinstance(value, str):
+        return value.strip().lower() not in _BAD_VALUES
+    return value is not None
+
+def _coerce_indicator(value):
+    """数据源常以字符串返回数值，能转换的按数值处理，'--'等占位符与文本保持原样"""
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+def extract_financial_indicators(raw_data:dict) -> dict:
+    """提取有效的财务分析指标，数值统一保留4位有效数字"""
+    indicators = {}
+    for k, v in raw_data.items():
+        v = _coerce_indicator(v)
+        if _is_valid_indicator(v):
+            indicators[k] = f"{v:.4g}" if isinstance(v, _NUMBER_TYPES) else v
+    return indicators
+
 def rolling_mean_tail(series:pd.DataFrame, window:int, default:float) -> float:
     if len(series) < window:
         return safe_float(series.mean(), default)
@@ -42,20 +81,22 @@ def get_price_info(price_data:pd.DataFrame) -> dict:
                 'volatility': -1
             }
         
-        # 获取最新数据
-        latest = price_data.iloc[-1]
+        # 一次性取出所需列的numpy数组，按位置读取，避免逐行构造Series
+        close_values = price_data['close'].to_numpy(dtype=np.float64)
         
         # 确保使用收盘价作为当前价格
-        current_price = float(latest['close'])
+        current_price = float(close_values[-1])
         logger.info(f"✓ 当前价格(收盘价): {current_price}")
         
         # 如果收盘价异常，尝试使用其他价格
         if pd.isna(current_price) or current_price <= 0:
-            if 'open' in price_data.columns and not pd.isna(latest['open']) and latest['open'] > 0:
-                current_price = float(latest['open'])
+            latest_open = safe_float(price_data['open'].iat[-1]) if 'open' in price_data.columns else -1
+            latest_high = safe_float(price_data['high'].iat[-1]) if 'high' in price_data.columns else -1
+            if latest_open > 0:
+                current_price = latest_open
                 logger.warning(f"⚠️ 收盘价异常，使用开盘价: {current_price}")
-            elif 'high' in price_data.columns and not pd.isna(latest['high']) and latest['high'] > 0:
-                current_price = float(latest['high'])
+            elif latest_high > 0:
+                current_price = latest_high
                 logger.warning(f"⚠️ 收盘价异常，使用最高价: {current_price}")
             else:
                 logger.error(f"❌ 所有价格数据都异常")
@@ -66,14 +107,16 @@ def get_price_info(price_data:pd.DataFrame) -> dict:
                     'volatility': -1
                 }
         
+        price_change = volume_ratio = volatility = -1
+        
         # 计算价格变化
         try:
-            if 'change_pct' in price_data.columns and not pd.isna(latest['change_pct']):
-                price_change = safe_float(latest['change_pct'])
+            latest_change = price_data['change_pct'].iat[-1] if 'change_pct' in price_data.columns else None
+            if latest_change is not None and not pd.isna(latest_change):
+                price_change = safe_float(latest_change)
                 logger.info(f"✓ 使用现成的涨跌幅: {price_change}%")
-            elif len(price_data) > 1:
-                prev = price_data.iloc[-2]
-                prev_price = safe_float(prev['close'])
+            elif len(close_values) > 1:
+                prev_price = safe_float(close_values[-2])
                 if prev_price > 0:
                     price_change = safe_float(((current_price - prev_price) / prev_price * 100))
                     logger.info(f"✓ 计算涨跌幅: {price_change}%")
@@ -84,21 +127,22 @@ def get_price_info(price_data:pd.DataFrame) -> dict:
         # 计算成交量比率
         try:
             if 'volume' in price_data.columns:
-                volume_data = price_data['volume'].dropna()
-                if len(volume_data) >= 20:
-                    recent_volume = volume_data.tail(5).mean()
-                    avg_volume = volume_data.tail(20).mean()
-                    volume_ratio = safe_float(recent_volume / avg_volume, -1)
+                volume_values = price_data['volume'].to_numpy(dtype=np.float64)
+                volume_values = volume_values[~np.isnan(volume_values)]
+                if len(volume_values) >= 20:
+                    volume_ratio = safe_float(volume_values[-5:].mean() / volume_values[-20:].mean(), -1)
         except Exception as e:
             logger.warning(f"计算成交量比率失败: {e}")
             volume_ratio = -1
         
-        # 计算波动率
+        # 计算波动率：最近20个收益率的样本标准差
         try:
-            close_prices = price_data['close'].dropna()
+            close_prices = close_values[~np.isnan(close_values)]
             if len(close_prices) >= 20:
-                returns = close_prices.pct_change().dropna()
-                volatility = safe_float(returns.tail(20).std() * 100)
+                recent = close_prices[-21:]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    returns = np.diff(recent) / recent[:-1]
+                volatility = safe_float(returns.std(ddof=1) * 100)
         except Exception as e:
             logger.warning(f"计算波动率失败: {e}")
             volatility = -1
@@ -129,7 +173,8 @@ def get_K_graph_table(price_data:pd.DataFrame) -> pd.DataFrame:
         logger.debug(f"输入的DataFrame缺少以下列: {missing_cols}")
         return None
     recent_data = price_data[columns_to_keep].tail(30)
-    result = recent_data.fillna("-1")
+    # 用数值-1填充缺失值，列保持float类型而不会提升为object
+    result = recent_data.fillna(-1)
     
     return result
 
@@ -143,6 +188,95 @@ def _get_default_technical_analysis() -> dict:
         'volume_status': '数据不足'
     }
     
+def _ema_bundle_loop(close):
+    """单次遍历计算 EMA5/10/20/60 的最后取值，以及 MACD 的 DIF/DEA 最后两个点"""
+    a5, a10, a20, a60 = 2.0 / 6.0, 2.0 / 11.0, 2.0 / 21.0, 2.0 / 61.0
+    a12, a26, a9 = 2.0 / 13.0, 2.0 / 27.0, 2.0 / 10.0
+    e5 = e10 = e20 = e60 = e12 = e26 = close[0]
+    # 首个点 DIF = EMA12 - EMA26 = 0，DEA 以其为初值
+    dif = dea = dif_prev = dea_prev = 0.0
+    for i in range(1, close.shape[0]):
+        x = close[i]
+        e5 += a5 * (x - e5)
+        e10 += a10 * (x - e10)
+        e20 += a20 * (x - e20)
+        e60 += a60 * (x - e60)
+        e12 += a12 * (x - e12)
+        e26 += a26 * (x - e26)
+        dif_prev, dea_prev = dif, dea
+        dif = e12 - e26
+        dea += a9 * (dif - dea)
+    return e5, e10, e20, e60, dif, dif_prev, dea, dea_prev
+
+@lru_cache(maxsize=None)
+def _jit(func):
+    """首次使用时才导入numba并编译内核，避免拖慢进程启动"""
+    from numba import njit
+    return njit(cache=True)(func)
+
+def warmup_indicator_kernels():
+    """预先导入numba并编译内核，避免首次分析时承担JIT编译耗时"""
+    if HAS_NUMBA:
+        warmup_values = np.linspace(1.0, 2.0, 64)
+        _jit(_ema_bundle_loop)(warmup_values)
+        _jit(_rsi_last_loop)(warmup_values, 14.0)
+
+def _ema_series(values:np.ndarray, span:int) -> np.ndarray:
+    """用 scipy.signal.lfilter 计算EMA序列（等价于 ewm(span, adjust=False)），递推在C中完成"""
+    from scipy.signal import lfilter
+    alpha = 2.0 / (span + 1.0)
+    # 初始状态使首个输出等于首个输入
+    return lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * values[0]])[0]
+
+def _ema_bundle(close_values:np.ndarray) -> tuple:
+    """返回 (ma5, ma10, ma20, ma60, dif_now, dif_prev, dea_now, dea_prev)，有numba且数据无缺失时走编译内核"""
+    has_nan = np.isnan(close_values).any()
+    if HAS_NUMBA and not has_nan:
+        return _jit(_ema_bundle_loop)(close_values)
+    if HAS_SCIPY and not has_nan:
+        ema = {span: _ema_series(close_values, span) for span in (5, 10, 20, 60, 12, 26)}
+        dif = ema[12] - ema[26]
+        dea = _ema_series(dif, 9)
+    else:
+        close = pd.Series(close_values)
+        ema = {span: close.ewm(span=span, adjust=False).mean().to_numpy() for span in (5, 10, 20, 60, 12, 26)}
+        dif = ema[12] - ema[26]
+        dea = pd.Series(dif).ewm(span=9, adjust=False).mean().to_numpy()
+    dif_tail, dea_tail = dif[-2:], dea[-2:]
+    return (ema[5][-1], ema[10][-1], ema[20][-1], ema[60][-1],
+            dif_tail[-1], dif_tail[0], dea_tail[-1], dea_tail[0])
+
+def _rsi_last_loop(close, window):
+    """单次遍历计算最后一个RSI，Wilder平滑（等价于 ewm(alpha=1/window, adjust=False)，以首个涨跌幅为初值）"""
+    delta = close[1] - close[0]
+    avg_gain = max(delta, 0.0)
+    avg_loss = max(-delta, 0.0)
+    for i in range(2, close.shape[0]):
+        delta = close[i] - close[i - 1]
+        avg_gain += (max(delta, 0.0) - avg_gain) / window
+        avg_loss += (max(-delta, 0.0) - avg_loss) / window
+    if avg_loss == 0:
+        return np.nan
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+def _rsi_last(close_values:np.ndarray, window:int) -> float:
+    """计算最后一个RSI（要求至少 window+1 个点），有numba且数据无缺失时走编译内核"""
+    if HAS_NUMBA and not np.isnan(close_values).any():
+        return _jit(_rsi_last_loop)(close_values, float(window))
+    delta = pd.Series(close_values).diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+
+    # 用 EWM 实现 Wilder 平滑
+    avg_gain = gain.ewm(alpha=1/window, min_periods=window, adjust=False).mean()
+    avg_loss = loss.ewm(alpha=1/window, min_periods=window, adjust=False).mean()
+
+    rs = avg_gain / avg_loss.replace(0, pd.NA)  # 防止除零
+    return 100 - (100 / (1 + rs.iloc[-1]))
+
+# MACD交叉方向 -> (零轴下方, 零轴上方) 的信号名称
+_MACD_CROSS_LABELS = {1: ('零下金叉', '零上金叉'), -1: ('零下死叉', '零上死叉')}
+
 def calculate_technical_indicators(price_data:pd.DataFrame) -> dict:
     """计算技术指标（修正版本）"""
     try:
@@ -151,14 +285,18 @@ def calculate_technical_indicators(price_data:pd.DataFrame) -> dict:
         
         technical_analysis = {}
         
+        # 均线与MACD所需的EMA只遍历一次收盘价计算
+        try:
+            close_values = price_data['close'].to_numpy(dtype=np.float64)
+            ma5, ma10, ma20, ma60, dif_now, dif_prev, dea_now, dea_prev = _ema_bundle(close_values)
+        except Exception as e:
+            # 后续均线、RSI、MACD、布林带均依赖收盘价与EMA结果，这里失败则直接返回默认结果
+            logger.error(f"均线/MACD计算失败: {e}")
+            return _get_default_technical_analysis()
+
         # 移动平均线
         try:
-            latest_price = safe_float(price_data['close'].iloc[-1])
-            close = price_data['close']
-            ma5 = close.ewm(span=5, adjust=False).mean().iloc[-1]
-            ma10 = close.ewm(span=10, adjust=False).mean().iloc[-1]
-            ma20 = close.ewm(span=20, adjust=False).mean().iloc[-1]
-            ma60 = close.ewm(span=60, adjust=False).mean().iloc[-1]
+            latest_price = safe_float(close_values[-1])
             
             technical_analysis['ma5'] = ma5
             technical_analysis['ma10'] = ma10
@@ -178,23 +316,12 @@ def calculate_technical_indicators(price_data:pd.DataFrame) -> dict:
         # RSI指标
         try:
             window = 14
-            close = price_data['close']
 
             # 检查数据是否足够
-            if len(close) < window + 1:
+            if len(close_values) < window + 1:
                 technical_analysis['rsi'] = "数据不足"
             else:
-                delta = close.diff()
-                gain = delta.clip(lower=0)
-                loss = -delta.clip(upper=0)
-
-                # 用 EWM 实现 Wilder 平滑
-                avg_gain = gain.ewm(alpha=1/window, min_periods=window, adjust=False).mean()
-                avg_loss = loss.ewm(alpha=1/window, min_periods=window, adjust=False).mean()
-
-                rs = avg_gain / avg_loss.replace(0, pd.NA)  # 防止除零
-                rsi_last = 100 - (100 / (1 + rs.iloc[-1]))
-                technical_analysis['rsi'] = safe_float(rsi_last, -1)
+                technical_analysis['rsi'] = safe_float(_rsi_last(close_values, window), -1)
                 if technical_analysis["rsi"] == -1:
                     technical_analysis["rsi"] = "计算失败"
             
@@ -202,32 +329,16 @@ def calculate_technical_indicators(price_data:pd.DataFrame) -> dict:
             technical_analysis['rsi'] = "计算失败"
         
         try:
-            close = price_data['close']
-            if len(close) < 35:
+            if len(close_values) < 35:
                 technical_analysis['macd_signal'] = '数据不足'
             else:
-                close_recent = close
-
-                # EMA 计算：用于最后两个点
-                ema12 = close_recent.ewm(span=12, adjust=False).mean()
-                ema26 = close_recent.ewm(span=26, adjust=False).mean()
-                dif = ema12 - ema26  # 快线（DIF）
-                dea = dif.ewm(span=9, adjust=False).mean()  # 慢线（DEA）
-
-                # 取最后两个点做交叉判断
-                dif_now, dif_prev = dif.iloc[-1], dif.iloc[-2]
-                dea_now, dea_prev = dea.iloc[-1], dea.iloc[-2]
-
-                if dif_prev < dea_prev and dif_now > dea_now:
-                    # DIF 上穿 DEA => 金叉
-                    technical_analysis['macd_signal'] = '零上金叉' if dif_now > 0 else '零下金叉'
-                elif dif_prev > dea_prev and dif_now < dea_now:
-                    # DIF 下穿 DEA => 死叉
-                    technical_analysis['macd_signal'] = '零上死叉' if dif_now > 0 else '零下死叉'
-                elif dif_now > dea_now:
-                    technical_analysis['macd_signal'] = '多头趋势'
+                # 快线（DIF）与慢线（DEA）取最后两个点做交叉判断
+                # 1: DIF 上穿 DEA（金叉），-1: DIF 下穿 DEA（死叉），0: 无交叉
+                cross = int(dif_prev < dea_prev and dif_now > dea_now) - int(dif_prev > dea_prev and dif_now < dea_now)
+                if cross:
+                    technical_analysis['macd_signal'] = _MACD_CROSS_LABELS[cross][int(dif_now > 0)]
                 else:
-                    technical_analysis['macd_signal'] = '空头趋势'
+                    technical_analysis['macd_signal'] = '多头趋势' if dif_now > dea_now else '空头趋势'
             
                 technical_analysis['dif'] = dif_now
                 technical_analysis['dea'] = dea_now
@@ -236,19 +347,19 @@ def calculate_technical_indicators(price_data:pd.DataFrame) -> dict:
             technical_analysis['macd_signal'] = '计算失败'
         
         try:
-            close = price_data['close']
             window = 20
-            if len(close) < 2:
+            if len(close_values) < 2:
                 technical_analysis['bb_position'] = "数据不足"
             else:
-                # 只取最后 window 个数据计算
-                close_recent = close.iloc[-window:]
+                # 只取最后 window 个数据计算，与pandas一致跳过缺失值
+                close_recent = close_values[-window:]
+                close_recent = close_recent[~np.isnan(close_recent)]
                 bb_middle = close_recent.mean()
-                bb_std = close_recent.std()
+                bb_std = close_recent.std(ddof=1) if len(close_recent) > 1 else np.nan
 
                 bb_upper = bb_middle + 2 * bb_std
                 bb_lower = bb_middle - 2 * bb_std
-                latest_close = safe_float(close.iloc[-1])
+                latest_close = safe_float(close_values[-1])
 
                 # 避免除以 0
                 band_range = bb_upper - bb_lower
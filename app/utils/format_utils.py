@@ -1,37 +1,95 @@
 import json
 import math
 import sys
+import time
+from functools import lru_cache
+from itertools import islice
 import numpy as np
 import pandas as pd
+from datetime import datetime, date, time as dt_time
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时回退到标准库json
+    orjson = None
+
+# (刷新时刻, 格式化后的时间字符串)，整体替换以保证读取一致
+_ts_cache = (0.0, '')
+
+def now_str() -> str:
+    """返回当前时间字符串（%Y-%m-%d %H:%M:%S），每秒最多格式化一次"""
+    global _ts_cache
+    now = time.time()
+    cached_at, cached_str = _ts_cache
+    if now - cached_at >= 1.0:
+        cached_str = datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S')
+        _ts_cache = (now, cached_str)
+    return cached_str
+
+# (刷新时刻, ISO格式时间字符串)，供SSE消息时间戳使用
+_iso_cache = (0.0, '')
+
+def now_iso() -> str:
+    """返回当前时间的ISO格式字符串，每100ms最多格式化一次"""
+    global _iso_cache
+    now = time.time()
+    cached_at, cached_str = _iso_cache
+    if now - cached_at >= 0.1:
+        cached_str = datetime.fromtimestamp(now).isoformat()
+        _iso_cache = (now, cached_str)
+    return cached_str
+
+def _orjson_default(obj):
+    """orjson无法原生处理的类型（pandas对象、日期子类等）交给 _clean_slow 转换"""
+    if type(obj) is pd.Timestamp:
+        # 最常见的情况（行情数据的日期列），直接格式化，不走 _clean_slow 的类型判断链
+        return obj.isoformat()
+    cleaned = _clean_slow(obj)
+    if cleaned is obj:
+        raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+    return cleaned
+
+def orjson_dumps(obj, sort_keys:bool=False) -> bytes | None:
+    """使用orjson序列化（NaN/Inf输出为null，无需预先清理），未安装orjson或遇到无法处理的类型时返回None"""
+    if orjson is None:
+        return None
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    try:
+        return orjson.dumps(obj, default=_orjson_default, option=option)
+    except (orjson.JSONEncodeError, TypeError):
+        return None
+
+def json_dumps(obj) -> bytes:
+    """序列化为UTF-8编码的JSON字节，优先使用orjson"""
+    data = orjson_dumps(obj)
+    if data is not None:
+        return data
+    return json.dumps(clean_data_for_json(obj), ensure_ascii=False).encode('utf-8')
 
 def format_dict_data(data_dict:dict, max_items:int=sys.maxsize) -> str:
     """格式化字典数据"""
     if not data_dict:
         return "无数据"
     
-    formatted = ""
-    for i, (key, value) in enumerate(data_dict.items()):
-        if i >= max_items:
-            break
-        formatted += f"- {key}: {value}\n"
+    formatted = "".join([f"- {key}: {value}\n" for key, value in islice(data_dict.items(), max_items)])
     
     return formatted if formatted else "无有效数据"
 
+def _format_list_item(item, max_items:int) -> str:
+    if isinstance(item, dict):
+        # 取字典的前几个键值对
+        item_str = ", ".join([f"{k}: {v}" for k, v in islice(item.items(), max_items)])
+        return f"- {item_str}\n"
+    return f"- {item}\n"
+
 def format_list_data(data_list:list, max_items:int=sys.maxsize) -> str:
     """格式化列表数据"""
     if not data_list:
         return "无数据"
     
-    formatted = ""
-    for i, item in enumerate(data_list):
-        if i >= max_items:
-            break
-        if isinstance(item, dict):
-            # 取字典的前几个键值对
-            item_str = ", ".join([f"{k}: {v}" for k, v in list(item.items())[:max_items]])
-            formatted += f"- {item_str}\n"
-        else:
-            formatted += f"- {item}\n"
+    formatted = "".join([_format_list_item(item, max_items) for item in islice(data_list, max_items)])
     
     return formatted if formatted else "无有效数据"
 
@@ -39,7 +97,7 @@ def format_value(data_dict:dict) -> dict:
     new_data_dict = {}
     for k, v in data_dict.items():
         if isinstance(v, (int, float)):
-            if pd.isna(v) or math.isnan(v) or math.isinf(v):
+            if math.isnan(v) or math.isinf(v):
                 continue
             else:
                 new_data_dict[k] = f"{v:.4g}"
@@ -47,18 +105,89 @@ def format_value(data_dict:dict) -> dict:
             new_data_dict[k] = v
     return new_data_dict
 
+_INF = float('inf')
+_NEG_INF = float('-inf')
+# numpy日期/时间差标量的缺失值（NaT）用 np.isnat 判断，无需调用 pd.isna
+_NAT_TYPES = (np.datetime64, np.timedelta64)
+# _clean_slow 中 isinstance 判断用到的类型元组，模块加载时构造一次
+_SEQUENCE_TYPES = (list, tuple)
+_NUM_TYPES = (int, float)
+_NP_SCALAR_TYPES = (np.integer, np.floating)
+_ISO_TYPES = (datetime, date, dt_time, pd.Timestamp)
+
+def _clean_identity(obj):
+    return obj
+
+def _clean_float(obj):
+    return None if obj != obj or obj == _INF or obj == _NEG_INF else obj
+
+def _clean_np_float(obj):
+    return None if obj != obj or obj == _INF or obj == _NEG_INF else obj.item()
+
+def _clean_np_item(obj):
+    return obj.item()
+
+# 标量类型按 type(obj) 直接分派，其余类型先按MRO解析，仍未命中的走 _clean_slow
+_CLEAN_DISPATCH = {
+    str: _clean_identity,
+    bool: _clean_identity,
+    int: _clean_identity,
+    type(None): _clean_identity,
+    float: _clean_float,
+    np.float64: _clean_np_float,
+    np.float32: _clean_np_float,
+    np.int64: _clean_np_item,
+    np.int32: _clean_np_item,
+    np.bool_: _clean_np_item,
+}
+
+@lru_cache(maxsize=None)
+def _resolve_clean_handler(cls):
+    """分派表未命中的类型沿MRO查找已登记的父类处理函数（每个类型只查找一次），找不到时使用 _clean_slow"""
+    for base in cls.__mro__[1:]:
+        handler = _CLEAN_DISPATCH.get(base)
+        if handler is not None:
+            return handler
+    return _clean_slow
+
 def clean_data_for_json(obj):
     """清理数据中的NaN、Infinity、日期等无效值，使其能够正确序列化为JSON"""
-    import pandas as pd
-    from datetime import datetime, date, time
-    
+    obj_type = type(obj)
+    if obj_type is dict:
+        root = {}
+    elif obj_type is list or obj_type is tuple:
+        root = []
+    else:
+        return (_CLEAN_DISPATCH.get(obj_type) or _resolve_clean_handler(obj_type))(obj)
+
+    # 用显式栈遍历嵌套的dict/list，避免逐层递归调用
+    stack = [(obj, root)]
+    while stack:
+        src, dst = stack.pop()
+        is_dict = type(dst) is dict
+        for key, value in (src.items() if is_dict else enumerate(src)):
+            value_type = type(value)
+            if value_type is dict:
+                cleaned = {}
+                stack.append((value, cleaned))
+            elif value_type is list or value_type is tuple:
+                cleaned = []
+                stack.append((value, cleaned))
+            else:
+                cleaned = (_CLEAN_DISPATCH.get(value_type) or _resolve_clean_handler(value_type))(value)
+            if is_dict:
+                dst[key] = cleaned
+            else:
+                dst.append(cleaned)
+    return root
+
+def _clean_slow(obj):
+    """clean_data_for_json 的通用分支，处理分派表之外的类型"""
     if isinstance(obj, dict):
         return {key: clean_data_for_json(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
+    elif isinstance(obj, _SEQUENCE_TYPES):
         return [clean_data_for_json(item) for item in obj]
-    elif isinstance(obj, tuple):
-        return [clean_data_for_json(item) for item in obj]
-    elif isinstance(obj, (int, float)):
+    elif isinstance(obj, _NUM_TYPES):
         if math.isnan(obj):
             return None
         elif math.isinf(obj):
@@ -66,23 +195,31 @@ def clean_data_for_json(obj):
         else:
             return obj
     elif isinstance(obj, np.ndarray):
+        if obj.dtype.kind in 'iub':
+            return obj.tolist()
+        if obj.dtype.kind == 'f':
+            # 一次向量化检查，只有确实存在NaN/Inf时才替换为None
+            mask = np.isfinite(obj)
+            if mask.all():
+                return obj.tolist()
+            return np.where(mask, obj, None).tolist()
         return clean_data_for_json(obj.tolist())
-    elif isinstance(obj, (np.integer, np.floating)):
+    elif isinstance(obj, pd.Series) and obj.dtype.kind in 'fiub':
+        return dict(zip(obj.index, clean_data_for_json(obj.to_numpy())))
+    elif isinstance(obj, _NP_SCALAR_TYPES):
         if np.isnan(obj):
             return None
         elif np.isinf(obj):
             return None
         else:
             return obj.item()
-    elif isinstance(obj, (datetime, date)):
-        return obj.isoformat() if hasattr(obj, 'isoformat') else str(obj)
-    elif isinstance(obj, time):
-        return obj.isoformat()
-    elif isinstance(obj, pd.Timestamp):
+    elif isinstance(obj, _ISO_TYPES):
         return obj.isoformat()
     elif isinstance(obj, pd.NaT.__class__):
         return None
-    elif pd.isna(obj):
+    elif obj is pd.NA:
+        return None
+    elif isinstance(obj, _NAT_TYPES) and np.isnat(obj):
         return None
     elif hasattr(obj, 'to_dict'):  # DataFrame或Series
         try:
@@ -0,0 +1,64 @@
+import gzip
+import json
+import os
+import re
+import time
+
+from app.logger import logger
+from app.utils.format_utils import json_dumps
+
+# 股票代码只允许字母、数字和点，防止拼接文件名时出现路径穿越
+_STOCK_CODE_PATTERN = re.compile(r'[0-9A-Za-z.]{1,12}')
+
+class ReportStore:
+    """按 (股票代码, 日期) 持久化完整分析报告，进程重启后仍可复用当日结果"""
+
+    def __init__(self, report_dir:str, max_age_seconds:float):
+        self.report_dir = os.path.realpath(os.path.expanduser(report_dir))
+        self.max_age_seconds = max_age_seconds
+
+    def _path(self, stock_code:str) -> str | None:
+        """返回报告文件路径，股票代码不合法或路径超出 report_dir 时返回None"""
+        if not isinstance(stock_code, str) or not _STOCK_CODE_PATTERN.fullmatch(stock_code):
+            logger.warning(f"非法的股票代码，不使用磁盘缓存: {stock_code!r}")
+            return None
+        path = os.path.realpath(os.path.join(self.report_dir, f"{stock_code}_{time.strftime('%Y%m%d')}.json.gz"))
+        if os.path.dirname(path) != self.report_dir:
+            logger.warning(f"缓存路径超出报告目录，不使用磁盘缓存: {stock_code!r}")
+            return None
+        return path
+
+    def load(self, stock_code:str) -> dict | None:
+        """读取未过期的报告，不存在或已过期时返回None"""
+        path = self._path(stock_code)
+        if path is None:
+            return None
+        try:
+            if time.time() - os.path.getmtime(path) >= self.max_age_seconds:
+                return None
+            with gzip.open(path, 'rb') as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取缓存报告失败 {stock_code}: {e}")
+            return None
+
+    def save(self, stock_code:str, report:dict):
+        """写入报告，先写临时文件再替换，避免并发读取到不完整的文件"""
+        path = self._path(stock_code)
+        if path is None:
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.report_dir, exist_ok=True)
+            with gzip.open(tmp_path, 'wb', compresslevel=5) as f:
+                f.write(json_dumps(report))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"保存缓存报告失败 {stock_code}: {e}")
+            # 写入或替换失败时清理临时文件，避免在报告目录中累积
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
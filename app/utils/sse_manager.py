@@ -1,92 +1,259 @@
 import threading
-from datetime import datetime
+import time
+from collections import deque
+from functools import lru_cache
+from queue import Empty, Queue
 
 from app.logger import logger
-from app.utils.format_utils import clean_data_for_json
+from app.utils.format_utils import json_dumps, now_iso
+
+# 每个SSE客户端最多缓存的消息数，超出后优先丢弃最旧的可丢弃消息
+SSE_CLIENT_MAXLEN = 1024
+# 心跳间隔（秒）
+SSE_HEARTBEAT_INTERVAL = 30
+# 客户端跟不上时允许丢弃的事件类型，结果、错误等关键事件始终保留
+DROPPABLE_EVENTS = frozenset({'log', 'progress', 'heartbeat'})
+
+def format_sse_frame(message) -> bytes:
+    """将消息序列化为一个SSE帧"""
+    try:
+        return b"data: " + json_dumps(message) + b"\n\n"
+    except (TypeError, ValueError) as e:
+        logger.error("SSE消息序列化失败: %s", e)
+        return format_sse_frame({'event': 'error', 'data': {'error': str(e)}})
+
+@lru_cache(maxsize=None)
+def _event_prefix(event_type:str) -> bytes:
+    """预先编码的SSE帧开头（含事件类型），每种事件只编码一次"""
+    return b'data: {"event":' + json_dumps(event_type) + b',"data":'
+
+def format_event_frame(event_type:str, data) -> bytes:
+    """拼接 {event, data, timestamp} 形式的SSE帧，只需序列化data，无需构造外层字典"""
+    try:
+        body = json_dumps(data)
+    except (TypeError, ValueError) as e:
+        logger.error("SSE消息序列化失败: %s", e)
+        return format_sse_frame({'event': 'error', 'data': {'error': str(e)}})
+    return b"".join((_event_prefix(event_type), body, b',"timestamp":"', now_iso().encode(), b'"}\n\n'))
+
+class ClientChannel:
+    """SSE客户端消息通道（有界deque + Event，单消费者）
+
+    deque 的 append/popleft/remove 在CPython中均为原子操作，生产者与消费者之间无需加锁。
+    """
+    
+    def __init__(self, maxlen:int=SSE_CLIENT_MAXLEN):
+        self.maxlen = maxlen
+        # 元素为 (SSE帧, 是否可丢弃)
+        self._messages = deque()
+        self._ready = threading.Event()
+        # 因背压被丢弃的消息数
+        self.backpressure_dropped = 0
+    
+    def put(self, message, block=False, droppable=True):
+        """追加消息并唤醒消费者，队列已满时丢弃最旧的可丢弃消息"""
+        if len(self._messages) >= self.maxlen and not self._drop_oldest_droppable():
+            if droppable:
+                # 队列中全是关键消息，丢弃新来的可丢弃消息
+                self.backpressure_dropped += 1
+                return
+        self._messages.append((message, droppable))
+        self._ready.set()
+    
+    def _drop_oldest_droppable(self) -> bool:
+        """丢弃最旧的一条可丢弃消息，没有可丢弃消息时返回False"""
+        # 在快照上查找，再按值移除；期间若已被消费者取走，则视为已腾出空间
+        for item in list(self._messages):
+            if item[1]:
+                try:
+                    self._messages.remove(item)
+                    self.backpressure_dropped += 1
+                except ValueError:
+                    pass
+                return True
+        return False
+    
+    def get(self, timeout:float):
+        """取出一条消息，超时抛出 queue.Empty"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._messages.popleft()[0]
+            except IndexError:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._ready.wait(remaining):
+                raise Empty
+            self._ready.clear()
 
 class SSEManager:
     """SSE连接管理器"""
     
+    # 分片数量（必须为2的幂）
+    NUM_SHARDS = 16
+    
     def __init__(self):
-        self.clients = {}
-        self.lock = threading.Lock()
+        # 按 client_id 哈希分片，每个分片独立加锁，不同客户端互不阻塞
+        self.shards = [({}, threading.Lock()) for _ in range(self.NUM_SHARDS)]
+        # 每个分片的 (client_id, queue) 元组快照，供广播复用；客户端增删时在锁内置为None
+        self._snapshots = [None] * self.NUM_SHARDS
+        self._heartbeat_thread = None
+    
+    def _shard_index(self, client_id) -> int:
+        return hash(client_id) & (self.NUM_SHARDS - 1)
+    
+    def _shard(self, client_id):
+        """返回 client_id 所在的 (客户端字典, 锁)"""
+        return self.shards[self._shard_index(client_id)]
     
     def add_client(self, client_id, queue):
         """添加SSE客户端"""
-        with self.lock:
-            self.clients[client_id] = queue
-            logger.info(f"SSE客户端连接: {client_id}")
+        index = self._shard_index(client_id)
+        clients, lock = self.shards[index]
+        with lock:
+            clients[client_id] = queue
+            self._snapshots[index] = None
+        logger.info("SSE客户端连接: %s", client_id)
     
     def remove_client(self, client_id):
         """移除SSE客户端"""
-        with self.lock:
-            if client_id in self.clients:
-                del self.clients[client_id]
-                logger.info(f"SSE客户端断开: {client_id}")
+        index = self._shard_index(client_id)
+        clients, lock = self.shards[index]
+        with lock:
+            removed = clients.pop(client_id, None) is not None
+            if removed:
+                self._snapshots[index] = None
+        if removed:
+            logger.info("SSE客户端断开: %s", client_id)
     
     def send_to_client(self, client_id, event_type, data):
         """向特定客户端发送消息"""
-        with self.lock:
-            if client_id in self.clients:
-                try:
-                    # 清理数据确保JSON可序列化
-                    cleaned_data = clean_data_for_json(data)
-                    message = {
-                        'event': event_type,
-                        'data': cleaned_data,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    self.clients[client_id].put(message, block=False)
-                    return True
-                except Exception as e:
-                    logger.error(f"SSE消息发送失败: {e}")
-                    return False
+        clients, lock = self._shard(client_id)
+        with lock:
+            queue = clients.get(client_id)
+        if queue is None:
+            return False
+        try:
+            # 在发送线程中直接序列化为SSE帧，队列里只存bytes
+            frame = format_event_frame(event_type, data)
+            queue.put(frame, block=False, droppable=event_type in DROPPABLE_EVENTS)
+            return True
+        except Exception as e:
+            logger.error("SSE消息发送失败: %s", e)
             return False
     
     def broadcast(self, event_type, data):
         """广播消息给所有客户端"""
-        with self.lock:
-            # 清理数据确保JSON可序列化
-            cleaned_data = clean_data_for_json(data)
-            message = {
-                'event': event_type,
-                'data': cleaned_data,
-                'timestamp': datetime.now().isoformat()
-            }
+        # 只序列化一次，所有客户端共享同一个帧
+        self.broadcast_raw(format_event_frame(event_type, data), droppable=event_type in DROPPABLE_EVENTS)
+    
+    def broadcast_raw(self, frame:bytes, droppable:bool=True):
+        """广播已序列化的SSE帧，droppable 表示客户端积压时该帧是否可被丢弃"""
+        for index, (clients, lock) in enumerate(self.shards):
+            # 快照只在客户端增删后于锁内重建一次，锁外投递消息
+            snapshot = self._snapshots[index]
+            if snapshot is None:
+                with lock:
+                    snapshot = self._snapshots[index] = tuple(clients.items())
             
             dead_clients = []
-            for client_id, queue in self.clients.items():
+            for client_id, queue in snapshot:
                 try:
-                    queue.put(message, block=False)
+                    queue.put(frame, block=False, droppable=droppable)
                 except Exception as e:
-                    logger.error(f"SSE广播失败给客户端 {client_id}: {e}")
-                    dead_clients.append(client_id)
+                    logger.error("SSE广播失败给客户端 %s: %s", client_id, e)
+                    dead_clients.append((client_id, queue))
             
             # 清理死连接
-            for client_id in dead_clients:
-                del self.clients[client_id]
+            if dead_clients:
+                with lock:
+                    for client_id, queue in dead_clients:
+                        # 期间客户端可能已用新队列重连，只删除失效的那一个
+                        if clients.get(client_id) is queue:
+                            del clients[client_id]
+                    self._snapshots[index] = None
+    
+    def start_heartbeat(self, interval:float=SSE_HEARTBEAT_INTERVAL):
+        """启动共享心跳线程（重复调用无副作用）"""
+        if self._heartbeat_thread is not None:
+            return
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, args=(interval,),
+                                                  name="sse-heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+    
+    def _heartbeat_loop(self, interval):
+        """每个周期只序列化一次心跳帧，再广播给所有客户端"""
+        while True:
+            time.sleep(interval)
+            if not len(self):
+                continue
+            try:
+                self.broadcast_raw(format_sse_frame({
+                    'event': 'heartbeat',
+                    'data': {'timestamp': now_iso()}
+                }))
+            except Exception as e:
+                logger.error("SSE心跳发送失败: %s", e)
                 
     def __len__(self):
-        with self.lock:
-            return len(self.clients)
+        total = 0
+        for clients, lock in self.shards:
+            with lock:
+                total += len(clients)
+        return total
         
 class StreamingSender:
-    """流式分析器"""
+    """流式分析器
+
+    send_* 只负责把事件放入发送队列，由后台写线程统一转发给SSEManager，
+    分析线程不会因为数据清理或加锁而阻塞。使用完毕后需调用 close()。
+    """
     
-    def __init__(self, client_id, sse_manager:SSEManager):
+    def __init__(self, client_id, sse_manager:SSEManager, max_pending:int=0):
         self.client_id = client_id
         self.sse_manager = sse_manager
+        # max_pending > 0 时队列有界，写线程跟不上时发送方会被阻塞（背压）
+        self._send_queue = Queue(maxsize=max_pending)
+        # 每个进度条最近一次发送的 (百分比, 消息, 当前股票)，内容不变时不重复发送
+        self._last_progress = {}
+        self._writer = threading.Thread(target=self._drain, name=f"sse-writer-{client_id}", daemon=True)
+        self._writer.start()
+    
+    def _emit(self, event_type, data):
+        """将事件放入发送队列"""
+        self._send_queue.put((event_type, data))
+    
+    def _drain(self):
+        """后台写线程：按顺序将队列中的事件发送给客户端"""
+        while True:
+            item = self._send_queue.get()
+            if item is None:
+                break
+            event_type, data = item
+            try:
+                self.sse_manager.send_to_client(self.client_id, event_type, data)
+            except Exception as e:
+                logger.error("SSE写线程发送失败: %s", e)
+    
+    def close(self, timeout:float=5):
+        """发送完队列中剩余的事件后停止写线程"""
+        self._send_queue.put(None)
+        self._writer.join(timeout)
     
     def send_log(self, message, log_type='info'):
         """发送日志消息"""
-        self.sse_manager.send_to_client(self.client_id, 'log', {
+        self._emit('log', {
             'message': message,
             'type': log_type
         })
     
     def send_progress(self, element_id, percent, message=None, current_stock=None):
         """发送进度更新"""
-        self.sse_manager.send_to_client(self.client_id, 'progress', {
+        state = (percent, message, current_stock)
+        if self._last_progress.get(element_id) == state:
+            return
+        self._last_progress[element_id] = state
+        self._emit('progress', {
             'element_id': element_id,
             'percent': percent,
             'message': message,
@@ -95,45 +262,43 @@ class StreamingSender:
     
     def send_data_quality(self, data_quality):
         """发送数据质量指标"""
-        self.sse_manager.send_to_client(self.client_id, 'data_quality_update', data_quality)
+        self._emit('data_quality_update', data_quality)
     
     def send_partial_result(self, data):
-        """发送部分结果"""
-        cleaned_data = clean_data_for_json(data)
-        self.sse_manager.send_to_client(self.client_id, 'partial_result', cleaned_data)
+        """发送部分结果（NaN、numpy等类型由序列化时统一处理）"""
+        self._emit('partial_result', data)
     
     def send_final_result(self, result):
-        """发送最终结果"""
-        cleaned_result = clean_data_for_json(result)
-        self.sse_manager.send_to_client(self.client_id, 'final_result', cleaned_result)
+        """发送最终结果（NaN、numpy等类型由序列化时统一处理）"""
+        self._emit('final_result', result)
     
     def send_batch_result(self, index:int, report:dict):
         """发送批量结果"""
-        self.sse_manager.send_to_client(self.client_id, 'batch_result', {
+        self._emit('batch_result', {
             "index": index,
             "report": report
         })
     
     def send_completion(self, message=None):
         """发送完成信号"""
-        self.sse_manager.send_to_client(self.client_id, 'analysis_complete', {
+        self._emit('analysis_complete', {
             'message': message or '分析完成'
         })
     
     def send_error(self, error_message):
         """发送错误信息"""
-        self.sse_manager.send_to_client(self.client_id, 'analysis_error', {
+        self._emit('analysis_error', {
             'error': error_message
         })
     
     def send_ai_stream(self, content):
         """发送AI流式内容"""
-        self.sse_manager.send_to_client(self.client_id, 'ai_stream', {
+        self._emit('ai_stream', {
             'content': content
         })
         
     def send_prompt(self, element_id:str, prompt:str):
-        self.sse_manager.send_to_client(self.client_id, 'ai_prompt', {
+        self._emit('ai_prompt', {
             'element_id': element_id,
             'content': prompt
         })
\ No newline at end of file
@@ -1,9 +1,20 @@
-import importlib
+import importlib.util
 
 from app.container.analyzer import set_analyzer, get_analyzer
 from app.services.analyzer import init_analyzer
 from app import create_app
 
+def create_wsgi_app(config_path:str="config.json"):
+    """WSGI入口，供gunicorn等生产服务器使用
+
+    SSE连接与分析任务状态保存在进程内，只能使用单进程多线程：
+    gunicorn -k gthread -w 1 --threads 16 -t 300 -b 0.0.0.0:5000 'run:create_wsgi_app()'
+    """
+    set_analyzer(init_analyzer(config_path))
+    if not get_analyzer():
+        raise RuntimeError("分析器初始化失败")
+    return create_app()
+
 def main():
     """主函数"""
     print("🚀 启动Web版现代股票分析系统...")
@@ -23,10 +34,9 @@ def main():
         "zhipuai"
     ]
     
+    # 只查找模块是否存在，不执行导入，避免启动时加载整个依赖
     for dep in required_deps:
-        try:
-            importlib.import_module(dep)
-        except ImportError:
+        if importlib.util.find_spec(dep) is None:
             missing_deps.append(dep)
             print(f"{dep} not installed")
             
@@ -79,6 +89,7 @@ def main():
     
     print("🌐 Web服务器启动中...")
     print("📱 请在浏览器中访问: http://localhost:5000")
+    print("🏭 生产部署: gunicorn -k gthread -w 1 --threads 16 -t 300 -b 0.0.0.0:5000 'run:create_wsgi_app()'")
     
     print("🌊 SSE事件类型:")
     print("   - connected: 连接确认")
@@ -93,7 +104,7 @@ def main():
     print("   - heartbeat: 心跳")
     print("=" * 70)
     
-    # 启动Flask服务器
+    # 启动Flask开发服务器
     try:
         app = create_app()
         app.run(